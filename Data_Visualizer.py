@@ -1,9 +1,7 @@
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
-from scipy.stats import shapiro, f_oneway
-import sqlite3
-import matplotlib.cm as cm
-import seaborn as sns
+from scipy.stats import shapiro, normaltest, f_oneway
 
 
 class PlayerVisualizer:
@@ -15,41 +13,57 @@ class PlayerVisualizer:
         - player_data: Instance of PlayerData containing the final_data DataFrame.
         """
         self.data = player_data.final_data
-        self.connection = sqlite3.connect(":memory:")
-        self.data.to_sql("players", self.connection, index=False, if_exists="replace")
-        self.clean_numeric_columns()
+        self._columns = frozenset(self.data.columns)
 
-    def clean_numeric_columns(self):
+    def _check_columns(self, *columns):
         """
-        Clean numeric columns in the dataset to remove formatting issues
-        (e.g., commas) and convert to proper numeric types.
+        Raise a ValueError for any requested column that is not in the dataset.
         """
-        for col in self.data.columns:
-            if self.data[col].dtype == "object":  # Only process object columns
-                try:
-                    # Remove commas and strip spaces
-                    self.data[col] = self.data[col].apply(
-                        lambda x: x.replace(",", "").strip() if isinstance(x, str) else x
-                    )
-                    # Convert to numeric
-                    self.data[col] = pd.to_numeric(self.data[col], errors="coerce")
-                except Exception as e:
-                    print(f"Error cleaning column '{col}': {e}")
+        unknown = [col for col in columns if col not in self._columns]
+        if unknown:
+            raise ValueError(f"Column(s) not found in player data: {', '.join(unknown)}")
 
-    def plot_stat_distribution(self, stat_column, title="Stat Distribution", bins=20):
+    @staticmethod
+    def _get_axes(ax, figsize):
+        """
+        Return (figure, axes, show) for a plot, creating a new figure only when
+        no Axes was passed in. show is True when the plot owns the figure.
+        """
+        if ax is not None:
+            return ax.figure, ax, False
+        fig, ax = plt.subplots(figsize=figsize)
+        return fig, ax, True
+
+    @staticmethod
+    def _show(fig, show):
+        """
+        Show and close a figure created by _get_axes, leaving caller-owned Axes alone.
+        """
+        if show:
+            fig.tight_layout()
+            plt.show()
+            plt.close(fig)
+
+    def plot_stat_distribution(self, stat_column, title="Stat Distribution", bins=20, ax=None):
         """
         Visualize the distribution of a specific stat across all players with a normality test
         and calculate basic statistics (mean, median, range).
+
+        Parameters:
+        - stat_column: Column name of the stat to visualize.
+        - title: Title of the plot.
+        - bins: Number of histogram bins.
+        - ax: Optional matplotlib Axes to draw into (a new figure is shown if omitted).
         """
-        query = f"SELECT `{stat_column}` FROM players WHERE `{stat_column}` IS NOT NULL"
-        stat_data = pd.read_sql_query(query, self.connection)
+        self._check_columns(stat_column)
+        stat_data = self.data[stat_column].dropna()
 
         if stat_data.empty:
             print(f"No valid data found for column '{stat_column}'.")
             return
 
         # Ensure the data is numeric
-        stat_data = pd.to_numeric(stat_data[stat_column], errors="coerce").dropna()
+        stat_data = pd.to_numeric(stat_data, errors="coerce").dropna()
 
         print(f"Number of entries for '{stat_column}': {len(stat_data)}")
 
@@ -63,9 +77,17 @@ class PlayerVisualizer:
         print(f"Median = {median_value:.2f}")
         print(f"Range = {range_value:.2f}")
 
-        # Perform Shapiro-Wilk test for normality
-        stat, p_value = shapiro(stat_data)
-        print(f"Shapiro-Wilk Test for Normality:\n"
+        # Perform Shapiro-Wilk test for normality; its p-value is only valid up to
+        # 5000 samples, so fall back to D'Agostino's K^2 test for larger data
+        values = np.sort(stat_data.to_numpy(dtype=np.float64))
+        if len(values) <= 5000:
+            test_name = "Shapiro-Wilk"
+            stat, p_value = shapiro(values)
+        else:
+            print(f"{len(values)} entries is above the Shapiro-Wilk limit of 5000.")
+            test_name = "D'Agostino-Pearson"
+            stat, p_value = normaltest(values)
+        print(f"{test_name} Test for Normality:\n"
               f"Statistic = {stat:.4f}, p-value = {p_value:.4f}")
         if p_value > 0.05:
             print(f"The data in '{stat_column}' appears to follow a normal distribution (p > 0.05).")
@@ -73,29 +95,26 @@ class PlayerVisualizer:
             print(f"The data in '{stat_column}' does not follow a normal distribution (p <= 0.05).")
 
         # Plot the distribution
-        plt.figure(figsize=(10, 6))
-        plt.hist(stat_data, bins=bins, edgecolor="black")
-        plt.title(title)
-        plt.xlabel(stat_column)
-        plt.ylabel("Frequency")
-        plt.grid(alpha=0.5)
-        plt.show()
-
-    def compare_players_stat(self, stat_column, *players):
+        fig, ax, show = self._get_axes(ax, figsize=(10, 6))
+        counts, edges = np.histogram(values, bins=bins)
+        ax.bar(edges[:-1], counts, width=np.diff(edges), align="edge", edgecolor="black")
+        ax.set_title(title)
+        ax.set_xlabel(stat_column)
+        ax.set_ylabel("Frequency")
+        ax.grid(alpha=0.5)
+        self._show(fig, show)
+
+    def compare_players_stat(self, stat_column, *players, ax=None):
         """
         Compare a specific stat across multiple players using a bar chart, a legend, unique colors, and ANOVA test.
 
         Parameters:
         - stat_column: Column name of the stat to compare.
         - *players: Variable number of player names to compare.
+        - ax: Optional matplotlib Axes to draw into (a new figure is shown if omitted).
         """
-        placeholders = ", ".join(["?"] * len(players))
-        query = f"""
-        SELECT Player, `{stat_column}`
-        FROM players
-        WHERE Player IN ({placeholders})
-        """
-        player_stats = pd.read_sql_query(query, self.connection, params=players)
+        self._check_columns(stat_column)
+        player_stats = self.data.loc[self.data["Player"].isin(players), ["Player", stat_column]].copy()
 
         if player_stats.empty:
             print(f"No data found for players: {', '.join(players)}.")
@@ -111,77 +130,65 @@ class PlayerVisualizer:
             print(f"No valid numeric data found for column '{stat_column}' for the specified players.")
             return
 
-        player_stats.set_index("Player", inplace=True)
+        player_stats = player_stats.set_index("Player")
 
         # Generate unique colors for each player
-        cmap = cm.get_cmap("tab10", len(player_stats))
-        colors = [cmap(i) for i in range(len(player_stats))]
+        colors = plt.cm.tab10(np.arange(len(player_stats)) % 10)
 
         # Create bar chart
-        plt.figure(figsize=(10, 6))
-        bars = plt.bar(player_stats.index, player_stats[stat_column], color=colors, edgecolor="black")
-        plt.title(f"{stat_column} Comparison for Selected Players")
-        plt.ylabel(stat_column)
-        plt.xlabel("Player")
-        plt.xticks(rotation=45)
-        plt.grid(alpha=0.3)
+        fig, ax, show = self._get_axes(ax, figsize=(10, 6))
+        bars = ax.bar(player_stats.index, player_stats[stat_column], color=colors, edgecolor="black")
+        ax.set_title(f"{stat_column} Comparison for Selected Players")
+        ax.set_ylabel(stat_column)
+        ax.set_xlabel("Player")
+        ax.tick_params(axis="x", labelrotation=45)
+        ax.grid(alpha=0.3)
 
         # Add legend for player names
-        plt.legend(bars, player_stats.index, title="Players", bbox_to_anchor=(1.05, 1), loc="upper left")
-        plt.tight_layout()
-        plt.show()
+        ax.legend(bars, player_stats.index, title="Players", bbox_to_anchor=(1.05, 1), loc="upper left")
+        self._show(fig, show)
 
-    def top_players_by_stat(self, stat_column, top_n=10):
+    def top_players_by_stat(self, stat_column, top_n=10, ax=None):
         """
         Visualize the top N players by a specific stat with basic statistics, a legend, and unique colors.
 
         Parameters:
         - stat_column: Column name of the stat to visualize.
         - top_n: Number of top players to display (default is 10).
+        - ax: Optional matplotlib Axes to draw into (a new figure is shown if omitted).
         """
-        query = f"""
-        SELECT Player, `{stat_column}`
-        FROM players
-        WHERE `{stat_column}` IS NOT NULL
-        """
-        top_players = pd.read_sql_query(query, self.connection)
+        self._check_columns(stat_column)
+        top_players = self.data[["Player", stat_column]].dropna(subset=[stat_column])
 
         if top_players.empty:
             print(f"No valid data found for column '{stat_column}'.")
             return
 
-        # Clean and convert the stat column to numeric
-        top_players[stat_column] = (
-            top_players[stat_column]
-            .replace({',': ''}, regex=True)  # Remove commas for large numbers
-            .astype(str)
-            .str.strip()  # Strip spaces
-        )
+        # Ensure the stat column is numeric
         top_players[stat_column] = pd.to_numeric(top_players[stat_column], errors='coerce')
 
-        # Filter valid data and sort by the stat column
+        # Filter valid data and keep the top N by the stat column
         top_players = top_players.dropna(subset=[stat_column])
         top_players = top_players[top_players[stat_column] > 0]
-        top_players = top_players.sort_values(by=stat_column, ascending=False).head(top_n)
+        top_players = top_players.nlargest(top_n, stat_column)
 
         if top_players.empty:
             print(f"No numeric data available for column '{stat_column}'.")
             return
 
-        top_players.set_index("Player", inplace=True)
+        top_players = top_players.set_index("Player")
 
         # Generate unique colors for each bar
-        cmap = cm.get_cmap("tab10", len(top_players))
-        colors = [cmap(i) for i in range(len(top_players))]
+        colors = plt.cm.tab10(np.arange(len(top_players)) % 10)
 
         # Plot the bar chart
-        plt.figure(figsize=(12, 8))
-        bars = plt.bar(top_players.index, top_players[stat_column], color=colors, edgecolor="black")
-        plt.title(f"Top {top_n} Players by {stat_column}")
-        plt.ylabel(stat_column)
-        plt.xlabel("Player")
-        plt.xticks(rotation=45, ha="right")
-        plt.grid(alpha=0.3)
+        fig, ax, show = self._get_axes(ax, figsize=(12, 8))
+        bars = ax.bar(top_players.index, top_players[stat_column], color=colors, edgecolor="black")
+        ax.set_title(f"Top {top_n} Players by {stat_column}")
+        ax.set_ylabel(stat_column)
+        ax.set_xlabel("Player")
+        plt.setp(ax.get_xticklabels(), rotation=45, ha="right")
+        ax.grid(alpha=0.3)
 
         # Calculate basic statistics
         mean_stat = top_players[stat_column].mean()
@@ -190,18 +197,25 @@ class PlayerVisualizer:
               f"Mean = {mean_stat:.4f}, Median = {median_stat:.4f}")
 
         # Add legend for player names
-        plt.legend(bars, top_players.index, title="Players", bbox_to_anchor=(1.05, 1), loc="upper left")
+        ax.legend(bars, top_players.index, title="Players", bbox_to_anchor=(1.05, 1), loc="upper left")
+        self._show(fig, show)
 
-        plt.tight_layout()
-        plt.show()
+    def plot_stat_heatmap(self, stat_column, group_column, title="Stat Heatmap", ax=None):
+        """
+        Visualize the average of a stat for each value of a grouping column as a heatmap.
 
-    def plot_stat_heatmap(self, stat_column, group_column, title="Stat Heatmap"):
-        query = f"""
-        SELECT `{group_column}`, `{stat_column}`
-        FROM players
-        WHERE `{stat_column}` IS NOT NULL AND `{group_column}` IS NOT NULL
+        Parameters:
+        - stat_column: Column name of the stat to average.
+        - group_column: Column name to group players by (e.g. position).
+        - title: Title of the plot.
+        - ax: Optional matplotlib Axes to draw into (a new figure is shown if omitted).
+
+        Returns:
+        - The AxesImage of the heatmap, so a caller drawing into its own Axes can
+          attach a colorbar once (only figures created here get one automatically).
         """
-        data = pd.read_sql_query(query, self.connection)
+        self._check_columns(stat_column, group_column)
+        data = self.data[[group_column, stat_column]].dropna()
 
         if data.empty:
             print(f"No valid data found for column '{stat_column}' grouped by '{group_column}'.")
@@ -214,13 +228,25 @@ class PlayerVisualizer:
         if data.empty:
             print(f"No valid numeric data available for '{stat_column}'.")
             return
-        heatmap_data = data.groupby(group_column)[stat_column].mean().reset_index()
-        heatmap_data = heatmap_data.pivot_table(index=group_column, values=stat_column)
-        plt.figure(figsize=(12, 8))
-        sns.heatmap(heatmap_data, annot=True, fmt=".1f", cmap="coolwarm", linewidths=0.5)
-        plt.title(title)
-        plt.ylabel(group_column)
-        plt.show()
+        heatmap_data = data.groupby(group_column, observed=True, sort=False)[stat_column].mean().to_frame()
+        fig, ax, show = self._get_axes(ax, figsize=(12, 8))
+        values = heatmap_data[stat_column].to_numpy()
+        image = ax.imshow(values[:, None], cmap="coolwarm", aspect="auto")
+        # A colorbar steals space from its Axes, so leave caller-owned Axes untouched
+        if show:
+            fig.colorbar(image, ax=ax)
+
+        # Annotate each cell with the group average
+        for row, value in enumerate(values):
+            ax.text(0, row, f"{value:.1f}", ha="center", va="center")
+        ax.set_xticks([0])
+        ax.set_xticklabels([stat_column])
+        ax.set_yticks(range(len(values)))
+        ax.set_yticklabels(heatmap_data.index)
+        ax.set_title(title)
+        ax.set_ylabel(group_column)
+        self._show(fig, show)
+        return image
 
 
 
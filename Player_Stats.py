@@ -1,9 +1,34 @@
-from pandas import to_numeric
+from types import MappingProxyType
+
+import numpy as np
+from pandas import Series
 
 class PlayerStats:
+    # Stat columns in the same order as the calculate_Points scoring arguments
+    STAT_COLUMNS = ['Sk', 'Rec', 'Fmb', 'Int', 'Rush Yards', 'Passing Yards', 'Receiving Yards',
+                    'Passing TD', 'Receiving TD', 'TD', '2pt Conversion']
+    # Default scoring parameters, in the same order as STAT_COLUMNS
+    _DEFAULT_SCORING = MappingProxyType({
+        'sack_score': 0,
+        'receptions_score': 1,
+        'fumble_score': -2,
+        'interception_score': -2,
+        'rushing_yards_score': 0.1,
+        'passing_yards_score': 0.04,
+        'receiving_yards_score': 0.1,
+        'td_score_passing': 4,
+        'td_receiving': 6,
+        'td_rushing': 6,
+        'conversion_score': 2
+    })
+    # Scoring parameter names matching STAT_COLUMNS
+    SCORING_KEYS = list(_DEFAULT_SCORING)
+    _WEIGHTS_VEC = np.array(list(_DEFAULT_SCORING.values()), dtype=np.float64)
+
     def __init__(self, player_name, player_data_instance):
         self.player_name = player_name
         self.player_data_instance = player_data_instance
+        self.games = player_data_instance.games_by_player.get(player_name, 1)
 
     def get_player_stats(self):
         """
@@ -13,12 +38,9 @@ class PlayerStats:
         - A DataFrame with the player's stats if found.
         - None if the player is not found in the dataset.
         """
-        player_data = self.player_data_instance.final_data[
-            self.player_data_instance.final_data['Player'] == self.player_name
-        ]
-        if not player_data.empty:
-            return player_data
-        else:
+        try:
+            return self.player_data_instance.by_player.loc[[self.player_name]]
+        except KeyError:
             print(f"No data found for player: {self.player_name}.")
             return None
 
@@ -38,8 +60,7 @@ class PlayerStats:
             return 0
 
         try:
-            stat_values = to_numeric(player_stats[column_name], errors='coerce')
-            return stat_values.sum() * multiplier
+            return player_stats[column_name].sum() * multiplier
         except KeyError:
             print(f"Column '{column_name}' not found in player data.")
             return 0
@@ -84,16 +105,7 @@ class PlayerStats:
         Returns:
         - Number of games played if available, else 1 to avoid division by zero.
         """
-        player_stats = self.get_player_stats()
-        if player_stats is None:
-            return 1
-
-        for column in ['Games', 'Games_y', 'Games_x']:
-            if column in player_stats.columns:
-                games = to_numeric(player_stats[column], errors='coerce')
-                if games.notna().any():
-                    return games.iloc[0]
-        return 1
+        return self.games
 
     def calculate_Points(self, sack_score, receptions_score, fumble_score, interception_score,
                          rushing_yards_score, passing_yards_score, receiving_yards_score,
@@ -101,31 +113,128 @@ class PlayerStats:
         """
         Calculate the total average points for the player based on multiple stats.
         """
-        total_score = (
-            self.count_sacks(sack_score) +
-            self.count_receptions(receptions_score) +
-            self.count_fumbles(fumble_score) +
-            self.count_interceptions(interception_score) +
-            self.count_rushing_yards(rushing_yards_score) +
-            self.count_passing_yards(passing_yards_score) +
-            self.count_receiving_yards(receiving_yards_score) +
-            self.count_td_passing(td_score_passing) +
-            self.count_receiving_td(td_receiving) +
-            self.count_rushing_td(td_rushing) +
-            self.count_2pt_conversions(conversion_score)
-        )
+        player_stats = self.get_player_stats()
+        if player_stats is None:
+            return 0
+
+        # Score every stat column in one dot product; missing columns count as 0
+        stat_values = player_stats.reindex(columns=self.STAT_COLUMNS).to_numpy(dtype=np.float64, na_value=0.0)
+        weights = np.array([sack_score, receptions_score, fumble_score, interception_score,
+                            rushing_yards_score, passing_yards_score, receiving_yards_score,
+                            td_score_passing, td_receiving, td_rushing, conversion_score],
+                           dtype=np.float64)
+        total_score = (stat_values @ weights).sum()
         games_played = self.get_games_played()
         if games_played > 0:
             return total_score / games_played
         return 0
 
+    @staticmethod
+    def _scoring_weights(scoring_params):
+        """
+        Return the scoring parameters as a weight vector in STAT_COLUMNS order.
+        """
+        if scoring_params is PlayerStats._DEFAULT_SCORING:
+            return PlayerStats._WEIGHTS_VEC
+        return np.array([scoring_params[key] for key in PlayerStats.SCORING_KEYS], dtype=np.float64)
+
+    @staticmethod
+    def _score_many(player_data, names, weights):
+        """
+        Calculate the average points for several players in one vectorized pass.
+
+        Parameters:
+        - player_data: Instance of PlayerData containing the final_data DataFrame.
+        - names: Player names to score.
+        - weights: Scoring weights in STAT_COLUMNS order.
+
+        Returns:
+        - A Series of average points indexed by player name (0 for players without data).
+        """
+        final_data_pl = player_data.final_data_pl
+        if final_data_pl is not None:
+            totals = PlayerStats._score_totals_polars(final_data_pl, names, weights)
+        else:
+            final_data = player_data.final_data
+            rows = final_data.loc[final_data['Player'].isin(names)]
+            stat_values = rows.reindex(columns=PlayerStats.STAT_COLUMNS).to_numpy(dtype=np.float64, na_value=0.0)
+            totals = Series(stat_values @ weights).groupby(rows['Player'].to_numpy()).sum()
+
+        games_by_player = player_data.games_by_player
+        games = np.fromiter((games_by_player.get(name, 1) for name in totals.index),
+                            dtype=np.float64, count=len(totals))
+        averages = (totals / games).where(games > 0, 0)
+
+        unique_names = list(dict.fromkeys(names))
+        for name in unique_names:
+            if name not in averages.index:
+                print(f"No data found for player: {name}.")
+        return averages.reindex(unique_names, fill_value=0)
+
+    @staticmethod
+    def _score_totals_polars(final_data_pl, names, weights):
+        """
+        Sum the weighted stats per player with a polars lazy query, so only the
+        requested players and stat columns are materialized.
+
+        Returns:
+        - A Series of total points indexed by player name.
+        """
+        # Only reached once final_data_pl has loaded polars, so this import is cheap
+        import polars as pl
+
+        schema = final_data_pl.collect_schema()
+        weighted = [
+            pl.col(column).cast(pl.Float64).fill_nan(0).fill_null(0) * float(weight)
+            for column, weight in zip(PlayerStats.STAT_COLUMNS, weights)
+            if column in schema
+        ]
+        totals = (
+            final_data_pl
+            .filter(pl.col('Player').is_in(list(names)))
+            .select(pl.col('Player'), pl.sum_horizontal(weighted or [pl.lit(0.0)]).alias('points'))
+            .group_by('Player')
+            .agg(pl.col('points').sum())
+            .collect()
+        )
+        return Series(totals['points'].to_numpy(), index=totals['Player'].to_list())
+
+    @staticmethod
+    def _score_players(players, scoring_params):
+        """
+        Score PlayerStats instances with _score_many, one pass per distinct
+        PlayerData instance so every player is scored against their own data.
+
+        Parameters:
+        - players: List of PlayerStats instances.
+        - scoring_params: Dictionary of scoring parameters.
+
+        Returns:
+        - An array of average points in the order of players (NaN where scoring failed).
+        """
+        points = np.full(len(players), np.nan)
+        # Positions of the players built on each PlayerData instance
+        positions_by_data = {}
+        for position, player in enumerate(players):
+            positions_by_data.setdefault(id(player.player_data_instance), []).append(position)
+
+        for positions in positions_by_data.values():
+            player_data = players[positions[0]].player_data_instance
+            names = [players[position].player_name for position in positions]
+            try:
+                weights = PlayerStats._scoring_weights(scoring_params)
+                points[positions] = PlayerStats._score_many(player_data, names, weights).reindex(names).to_numpy()
+            except Exception as e:
+                print(f"Error calculating points for {', '.join(names)}: {e}")
+        return points
+
     @staticmethod
     def compare_players(*players, scoring_params=None):
         """
         Compare multiple players and return a summary of their average points.
 
         Parameters:
-        - *players: PlayerStats instances to compare.
+        - *players: PlayerStats instances to compare, each scored against its own PlayerData.
         - scoring_params: Optional dictionary of scoring parameters.
 
         Returns:
@@ -134,43 +243,13 @@ class PlayerStats:
         if len(players) < 2:
             return "At least two players are required for comparison."
 
-        # Default scoring parameters if none are provided
-        default_scoring = {
-            'sack_score': 0,
-            'receptions_score': 1,
-            'fumble_score': -2,
-            'interception_score': -2,
-            'rushing_yards_score': 0.1,
-            'passing_yards_score': 0.04,
-            'receiving_yards_score': 0.1,
-            'td_score_passing': 4,
-            'td_receiving': 6,
-            'td_rushing': 6,
-            'conversion_score': 2
-        }
-        scoring_params = scoring_params or default_scoring
-
-        # Calculate scores for all players
-        scores = {}
-        for player in players:
-            try:
-                points = player.calculate_Points(
-                    scoring_params['sack_score'],
-                    scoring_params['receptions_score'],
-                    scoring_params['fumble_score'],
-                    scoring_params['interception_score'],
-                    scoring_params['rushing_yards_score'],
-                    scoring_params['passing_yards_score'],
-                    scoring_params['receiving_yards_score'],
-                    scoring_params['td_score_passing'],
-                    scoring_params['td_receiving'],
-                    scoring_params['td_rushing'],
-                    scoring_params['conversion_score']
-                )
-                scores[player.player_name] = points
-            except Exception as e:
-                print(f"Error calculating points for {player.player_name}: {e}")
-                scores[player.player_name] = None
+        scoring_params = scoring_params or PlayerStats._DEFAULT_SCORING
+
+        # Calculate scores in one pass per PlayerData instance; players that could
+        # not be scored come back missing and are reported as missing data below
+        points = PlayerStats._score_players(players, scoring_params)
+        scores = {player.player_name: None if np.isnan(score) else score
+                  for player, score in zip(players, points)}
 
         # Sort players by their scores
         sorted_scores = sorted(scores.items(), key=lambda x: x[1] if x[1] is not None else -float('inf'), reverse=True)
@@ -200,52 +279,20 @@ class PlayerStats:
 
         Parameters:
         - group1: List of PlayerStats instances (Team 1).
-        - group2: List of PlayerStats instances (Team 2).
+        - group2: List of PlayerStats instances (Team 2). Each player is scored
+          against its own PlayerData, so the groups may come from different datasets.
         - scoring_params: Optional dictionary of scoring parameters.
 
         Returns:
         - A string describing the point difference between the two groups.
         """
-        # Default scoring parameters
-        default_scoring = {
-            'sack_score': 0,
-            'receptions_score': 1,
-            'fumble_score': -2,
-            'interception_score': -2,
-            'rushing_yards_score': 0.1,
-            'passing_yards_score': 0.04,
-            'receiving_yards_score': 0.1,
-            'td_score_passing': 4,
-            'td_receiving': 6,
-            'td_rushing': 6,
-            'conversion_score': 2
-        }
-        scoring_params = scoring_params or default_scoring
-
-        def calculate_group_points(group):
-            total_points = 0
-            for player in group:
-                try:
-                    points = player.calculate_Points(
-                        scoring_params['sack_score'],
-                        scoring_params['receptions_score'],
-                        scoring_params['fumble_score'],
-                        scoring_params['interception_score'],
-                        scoring_params['rushing_yards_score'],
-                        scoring_params['passing_yards_score'],
-                        scoring_params['receiving_yards_score'],
-                        scoring_params['td_score_passing'],
-                        scoring_params['td_receiving'],
-                        scoring_params['td_rushing'],
-                        scoring_params['conversion_score']
-                    )
-                    total_points += points
-                except Exception as e:
-                    print(f"Error calculating points for {player.player_name}: {e}")
-            return total_points
-
-        group1_points = calculate_group_points(group1)
-        group2_points = calculate_group_points(group2)
+        scoring_params = scoring_params or PlayerStats._DEFAULT_SCORING
+
+        # Score both groups together, then total each group; players that could
+        # not be scored count as 0
+        scores = PlayerStats._score_players([*group1, *group2], scoring_params)
+        group1_points = np.nansum(scores[:len(group1)])
+        group2_points = np.nansum(scores[len(group1):])
 
         point_difference = group1_points - group2_points
 
@@ -258,50 +305,22 @@ class PlayerStats:
 
     @staticmethod
     def calculate_points_with_starters(group1, starters1, group2, starters2, scoring_params=None):
-        default_scoring = {
-            'sack_score': 0,
-            'receptions_score': 1,
-            'fumble_score': -2,
-            'interception_score': -2,
-            'rushing_yards_score': 0.1,
-            'passing_yards_score': 0.04,
-            'receiving_yards_score': 0.1,
-            'td_score_passing': 4,
-            'td_receiving': 6,
-            'td_rushing': 6,
-            'conversion_score': 2
-        }
-        scoring_params = scoring_params or default_scoring
-        def calculate_group_points(group, starters):
-            total_points = 0
-            for player in group:
-                try:
-                    points = player.calculate_Points(
-                        scoring_params['sack_score'],
-                        scoring_params['receptions_score'],
-                        scoring_params['fumble_score'],
-                        scoring_params['interception_score'],
-                        scoring_params['rushing_yards_score'],
-                        scoring_params['passing_yards_score'],
-                        scoring_params['receiving_yards_score'],
-                        scoring_params['td_score_passing'],
-                        scoring_params['td_receiving'],
-                        scoring_params['td_rushing'],
-                        scoring_params['conversion_score']
-                    )
-                    # Check if the player is a starter
-                    if player.player_name not in starters:
-                        points /= 2  # Halve the points if not a starter
-                        if points < 9:  # If non-starter points are less than 9, count as 0
-                            points = 0
-                    total_points += points
-                except Exception as e:
-                    print(f"Error calculating points for {player.player_name}: {e}")
-            return total_points
+        scoring_params = scoring_params or PlayerStats._DEFAULT_SCORING
+        scores = PlayerStats._score_players([*group1, *group2], scoring_params)
+
+        def calculate_group_points(group, starters, points):
+            starters = frozenset(starters)
+            names = [player.player_name for player in group]
+            points = np.nan_to_num(points)
+            is_starter = np.fromiter((name in starters for name in names), dtype=np.bool_, count=len(names))
+            # Halve the points of non-starters, counting them as 0 if below 9
+            bench_points = points / 2
+            bench_points[bench_points < 9] = 0
+            return np.where(is_starter, points, bench_points).sum()
 
         # Calculate points for both groups
-        group1_points = calculate_group_points(group1, starters1)
-        group2_points = calculate_group_points(group2, starters2)
+        group1_points = calculate_group_points(group1, starters1, scores[:len(group1)])
+        group2_points = calculate_group_points(group2, starters2, scores[len(group1):])
 
         point_difference = group1_points - group2_points
 
@@ -1,169 +1,386 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from datetime import timedelta
+from functools import reduce
+from glob import glob
+from io import StringIO
+import os
+import re
+import tempfile
+
+import numpy as np
 import pandas as pd
 import requests
-from bs4 import BeautifulSoup
-
+from requests.adapters import HTTPAdapter
+
+try:
+    import pyarrow
+    # Arrow-backed strings keep player names in contiguous buffers for faster .str ops
+    _PLAYER_DTYPE = 'string[pyarrow]'
+except ImportError:  # pyarrow is optional; fall back to pandas' own string dtype
+    pyarrow = None
+    _PLAYER_DTYPE = 'string'
+
+try:
+    from requests_cache import CachedSession
+except ImportError:  # requests-cache is optional; without it every run refetches
+    CachedSession = None
+
+# Browser-like headers sent with every request; Accept-Encoding is left to
+# requests so it only advertises encodings it can decode
+_REQ_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:102.0) Gecko/20100101 Firefox/102.0',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Referer': 'https://www.footballdb.com',
+    'DNT': '1',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1'
+}
+
+# Seconds to wait on a stats site before giving up on the request
+_REQUEST_TIMEOUT = 15
+
+# Directory holding the cleaned source frames as parquet, keyed by page ETag
+_FRAME_CACHE_DIR = '.cache'
+# Part of every cached frame's file name; bump it whenever a loader's cleaning
+# (name regexes, kept columns, dtypes) changes so old frames are not reused
+_FRAME_CACHE_VERSION = 1
+
+# pro-football-reference passing columns kept by load_passing_data
+_PASSING_COLUMNS = ['Rk', 'Player', 'Pos', 'G', 'Yds', 'TD', 'Int', 'Y/G', 'Sk']
+
+# footballdb player cells hold the full name followed by an abbreviated one
+# (e.g. "Ja'Marr ChaseJ. Chase"). One pass removes that trailing abbreviation
+# (from the last "X. " to the end), " Jr." suffixes and any remaining periods.
+# The first alternative spells out "no later X. " without a lookahead, and the
+# pattern stays a plain string, so pyarrow's RE2 kernel can run it on
+# Arrow-backed strings; a compiled pattern would send pandas to Python's re.
+_FOOTBALLDB_NAME_NOISE = r"[A-Z]\. (?:[^.]|\.[^ ]|[^A-Z]\. )*\.?$| Jr\.|\."
 
 
 class PlayerData:
-    def __init__(self):
+    # Row count from which batched scoring runs through polars (when installed)
+    POLARS_MIN_ROWS = 50_000
+
+    def __init__(self, debug=False):
+        self.debug = debug
         self.urlPassing = "https://www.pro-football-reference.com/years/2024/passing.htm"
         self.urlReceiving = "https://www.footballdb.com/statistics/nfl/player-stats/receiving"
         self.urlRushing = "https://www.footballdb.com/statistics/nfl/player-stats/rushing"
         self.urlConversions = "https://www.teamrankings.com/nfl/player-stat/scoring-two-point-conversions"
         self.urlFumbles = "https://www.teamrankings.com/nfl/player-stat/fumbles-lost"
-        self.passing = self.load_passing_data()
-        self.receiving = self.load_receiving_data()
-        self.rushing = self.fetch_rushing_data()
-        self.conversions = self.load_conversion_data()
-        self.fumbles = self.load_fumble_data()
+        # One pooled session so requests to the same host reuse the connection.
+        # Responses are cached on disk when requests-cache is installed, since
+        # the stats change at most weekly.
+        if CachedSession is not None:
+            self.session = CachedSession('nfl_cache', expire_after=timedelta(hours=6))
+        else:
+            self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=8, pool_maxsize=8))
+        self.session.headers.update(_REQ_HEADERS)
+        # The five sources are independent network fetches, so load them concurrently
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            passing = executor.submit(self.load_cached, 'passing', self.urlPassing, self.load_passing_data)
+            receiving = executor.submit(self.load_cached, 'receiving', self.urlReceiving, self.load_receiving_data)
+            rushing = executor.submit(self.load_cached, 'rushing', self.urlRushing, self.fetch_rushing_data)
+            conversions = executor.submit(self.load_cached, 'conversions', self.urlConversions, self.load_conversion_data)
+            fumbles = executor.submit(self.load_cached, 'fumbles', self.urlFumbles, self.load_fumble_data)
+        self.passing = passing.result()
+        self.receiving = receiving.result()
+        self.rushing = rushing.result()
+        self.conversions = conversions.result()
+        self.fumbles = fumbles.result()
         self.final_data = self.merge_datasets()
-
+        self.games_by_player = self.build_games_lookup()
+        self._by_player = None
+        self._final_data_pl = None
+        if self.debug:
+            self.write_debug_files()
+
+
+    def load_cached(self, name, url, loader):
+        """
+        Return a source's cleaned DataFrame from the parquet cache when the page
+        is unchanged, otherwise run its loader and cache the result.
+
+        The page's ETag (or Last-Modified) from a HEAD request and
+        _FRAME_CACHE_VERSION are part of the cache file name, so neither a new
+        version of the page nor a change to the cleaning code reuses a stale frame.
+        Without pyarrow, a successful HEAD request or either header, the loader
+        simply runs every time.
+
+        Parameters:
+        - name: Short name of the source, used in the cache file name.
+        - url: URL of the source page.
+        - loader: Method that fetches and cleans the source.
+
+        Returns:
+        - The cleaned DataFrame for the source.
+        """
+        if pyarrow is None:
+            return loader()
+        try:
+            response = self.session.head(url, timeout=_REQUEST_TIMEOUT)
+        except requests.RequestException:
+            # The cache is optional; let the loader's own request report real failures
+            return loader()
+        # An error response's headers say nothing about the stats page
+        if not response.ok:
+            return loader()
+        version = response.headers.get('ETag') or response.headers.get('Last-Modified')
+        if not version:
+            return loader()
+        # Keep only filename-safe characters of the version tag
+        version = re.sub(r'[^\w-]', '', version)
+        path = os.path.join(_FRAME_CACHE_DIR, f"{name}_v{_FRAME_CACHE_VERSION}_{version}.parquet")
+        if os.path.exists(path):
+            try:
+                return pd.read_parquet(path).astype({'Player': _PLAYER_DTYPE})
+            except (OSError, ValueError, pyarrow.ArrowException) as e:
+                # A corrupt cache file would fail every run; drop it and reload
+                print(f"Discarding unreadable cached {name} data: {e}")
+                with suppress(OSError):
+                    os.remove(path)
+        data = loader()
+        self.write_cached_frame(name, path, data)
+        return data
+
+    def write_cached_frame(self, name, path, data):
+        """
+        Write a cleaned DataFrame to the parquet cache and remove the frames it supersedes.
+
+        The frame is written to a temporary file first and moved into place, so an
+        interrupted write never leaves a truncated file at the cache path.
+
+        Parameters:
+        - name: Short name of the source, used in the cache file name.
+        - path: Cache file path for the current page version.
+        - data: The cleaned DataFrame to store.
+        """
+        os.makedirs(_FRAME_CACHE_DIR, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=_FRAME_CACHE_DIR, suffix='.tmp')
+        os.close(fd)
+        try:
+            data.to_parquet(temp_path)
+            os.replace(temp_path, path)
+        except (OSError, ValueError, TypeError, pyarrow.ArrowException) as e:
+            # Columns of mixed Python types cannot be stored; just skip caching
+            print(f"Could not cache {name} data: {e}")
+            with suppress(OSError):
+                os.remove(temp_path)
+            return
+        # Older page or cache versions of this source are never read again
+        for old_path in glob(os.path.join(_FRAME_CACHE_DIR, f"{name}_v*_*.parquet")):
+            if old_path != path:
+                with suppress(OSError):
+                    os.remove(old_path)
+
+    def _fetch_html(self, url):
+        """
+        Fetch a stats page through the shared session and return its HTML.
+
+        Raises requests.HTTPError (naming the status and URL) on error pages,
+        e.g. rate limiting, instead of letting them be parsed as stats.
+        """
+        response = self.session.get(url, timeout=_REQUEST_TIMEOUT)
+        response.raise_for_status()
+        return response.text
+
+    def _load_footballdb(self, url, drop, rename, numeric_columns):
+        """
+        Fetch and clean a footballdb player stats table.
+
+        Parameters:
+        - url: URL of the footballdb stats page.
+        - drop: Columns to discard.
+        - rename: Mapping of footballdb column names to the merged column names.
+        - numeric_columns: The (renamed) stat columns to cast to numbers.
+
+        Returns:
+        - The cleaned DataFrame.
+        """
+        data = pd.read_html(StringIO(self._fetch_html(url)), flavor='lxml')[0]
+
+        # Blank player cells belong to the player on the row above, then strip
+        # the abbreviated name, suffixes and periods in one pass
+        player = (
+            data['Player'].astype(_PLAYER_DTYPE).replace("", pd.NA).ffill()
+            .str.replace(_FOOTBALLDB_NAME_NOISE, '', regex=True)
+        )
+
+        data = (
+            data.assign(Player=player)
+            # Remove rows where 'Player' column is blank
+            [player.notna() & (player != "")]
+            .drop(columns=drop)
+            .rename(columns=rename)
+        )
+        return self.cast_numeric_columns(data, numeric_columns)
 
     def load_passing_data(self):
-        passing = pd.read_html(self.urlPassing)[0]
-        passing.drop(columns=['Age', 'Awards', 'QBR', 'GS', 'QBrec', 'Cmp', 'Att', "Cmp%", 'TD%', 'Int%', '1D', 'Succ%', 'Lng', 'Y/A', 'AY/A', 'Y/C', 'Rate', 'Yds.1', 'Sk%', 'NY/A', 'ANY/A', '4QC', 'GWD'], inplace=True)
-        passing.rename(columns={'G': 'Games', 'Yds': 'Passing Yards', 'Pos': 'Position', 'TD' : 'Passing TD'}, inplace=True)
-        passing['Player'] = passing['Player'].str.replace(' Jr.', '', regex=False)
-        passing.drop(columns=['Team'], inplace=True)
-        passing = passing.replace(r'\.', '', regex=True)
-        passing.to_excel('passing.xlsx')
-        return passing
+        passing = (
+            pd.read_html(StringIO(self._fetch_html(self.urlPassing)), flavor='lxml')[0]
+            # Select the few columns we use straight away so the cleanup below
+            # only touches them instead of the whole table
+            [_PASSING_COLUMNS]
+            .rename(columns={'G': 'Games', 'Yds': 'Passing Yards', 'Pos': 'Position', 'TD' : 'Passing TD'})
+            # Only the text columns can hold periods (e.g. "C.J. Stroud")
+            .assign(
+                Player=lambda d: (
+                    d['Player'].astype(_PLAYER_DTYPE)
+                    .str.replace(' Jr.', '', regex=False)
+                    .str.replace('.', '', regex=False)
+                ),
+                Position=lambda d: d['Position'].replace(r'\.', '', regex=True)
+            )
+        )
+        return self.cast_numeric_columns(passing, ['Games', 'Passing Yards', 'Passing TD', 'Int', 'Y/G', 'Sk'])
 
     def load_receiving_data(self):
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:102.0) Gecko/20100101 Firefox/102.0',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Referer': 'https://www.footballdb.com',
-            'DNT': '1',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1'
-        }
-        response = requests.get(self.urlReceiving, headers=headers)
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.content, 'html.parser')
-            table = soup.find('table')
-            if table:
-                headers = [header.text.strip() for header in table.find_all('th')]
-                data = []
-                last_player = None
-                for row in table.find_all('tr'):
-                    cells = row.find_all('td')
-                    if cells:
-                        player_name = cells[0].text.strip()
-                        if player_name == "":
-                            player_name = last_player
-                        else:
-                            last_player = player_name
-                        # Remove everything after the last period in player names
-                        player_name = player_name.rsplit('.', 1)[0]  # Keeps everything before the last period
-                        data.append([player_name] + [cell.text.strip() for cell in cells[1:]])
-                receiving = pd.DataFrame(data, columns=headers)
-
-                # Remove last letter from the 'Player' column (if this is still needed)
-                receiving['Player'] = receiving['Player'].str[:-1]
-
-                # Remove rows where 'Player' column is blank
-                receiving = receiving[receiving['Player'].notna() & (receiving['Player'] != "")]
-
-                receiving.drop(columns={'Lg', 'FD', 'Tar', 'YAC', 'Avg', 'YPG'}, inplace=True)
-                receiving.rename(columns={'Yds': 'Receiving Yards', 'Gms': 'Games', 'TD' : 'Receiving TD'}, inplace=True)
-
-                # Normalize team names
-                team_corrections = {
-                    'LV': 'LVR', 'KC': 'KAN', 'GB': 'GNB', 'TB': 'TAM', 'NO': 'NOR',
-                    'LA': 'LAR', 'NE': 'NWE', 'SF': 'SFO'
-                }
-                receiving['Team'] = receiving['Team'].replace(team_corrections)
-                receiving['Player'] = receiving['Player'].str.replace(' Jr.', '', regex=False)
-                receiving.drop(columns=['Team'], inplace=True)
-                # Assuming your DataFrame is named df
-                receiving = receiving.replace(r'\.', '', regex=True)
-                receiving['Player'] = receiving['Player'].str.replace(r'(Amon-Ra St Brown).*', r'\1', regex=True)
-                receiving.to_excel('hello.xlsx')
-                return receiving
-        raise ValueError('Status code is not right')
-
+        return self._load_footballdb(
+            self.urlReceiving,
+            drop=['Lg', 'FD', 'Tar', 'YAC', 'Avg', 'YPG', 'Team'],
+            rename={'Yds': 'Receiving Yards', 'Gms': 'Games', 'TD' : 'Receiving TD'},
+            numeric_columns=['Games', 'Rec', 'Receiving Yards', 'Receiving TD']
+        )
 
     def load_conversion_data(self):
-        conversions = pd.read_html(self.urlConversions)[0]
-        conversions.drop(columns=['Team', 'Rank', 'Pos'], inplace=True)
-        conversions.rename(columns={'Value': '2pt Conversion'}, inplace=True)
-        conversions['Player'] = conversions['Player'].str.replace(' Jr.', '', regex=False)
-        
-        return conversions
+        conversions = (
+            pd.read_html(StringIO(self._fetch_html(self.urlConversions)), flavor='lxml')[0]
+            .drop(columns=['Team', 'Rank', 'Pos'])
+            .rename(columns={'Value': '2pt Conversion'})
+            .assign(Player=lambda d: d['Player'].astype(_PLAYER_DTYPE).str.replace(' Jr.', '', regex=False))
+        )
+        return self.cast_numeric_columns(conversions, ['2pt Conversion'])
 
     def fetch_rushing_data(self):
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:102.0) Gecko/20100101 Firefox/102.0',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Referer': 'https://www.footballdb.com',
-            'DNT': '1',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1'
-        }
-        response = requests.get(self.urlRushing, headers=headers)
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.content, 'html.parser')
-            table = soup.find('table')
-            if table:
-                headers = [header.text.strip() for header in table.find_all('th')]
-                data = []
-                last_player = None
-                for row in table.find_all('tr'):
-                    cells = row.find_all('td')
-                    if cells:
-                        player_name = cells[0].text.strip()
-                        if player_name == "":
-                            player_name = last_player
-                        else:
-                            last_player = player_name
-                        # Remove everything after the last period in player names
-                        player_name = player_name.rsplit('.', 1)[0]  # Keeps everything before the last period
-                        data.append([player_name] + [cell.text.strip() for cell in cells[1:]])
-                rushing = pd.DataFrame(data, columns=headers)
-
-                # Remove last letter from the 'Player' column (if this is still needed)
-                rushing['Player'] = rushing['Player'].str[:-1]
-
-                # Remove rows where 'Player' column is blank
-                rushing = rushing[rushing['Player'].notna() & (rushing['Player'] != "")]
-
-                rushing.drop(columns=['Lg', 'FD'], inplace=True)
-                rushing.rename(columns={'Yds': 'Rush Yards', 'Pos': 'Position', 'Gms': 'Games'}, inplace=True)
-                # Normalize team names
-                team_corrections = {
-                    'LV': 'LVR', 'KC': 'KAN', 'GB': 'GNB', 'TB': 'TAM', 'NO': 'NOR',
-                    'LA': 'LAR', 'NE': 'NWE', 'SF': 'SFO'
-                }
-                rushing['Team'] = rushing['Team'].replace(team_corrections)
-                rushing['Player'] = rushing['Player'].str.replace(' Jr.', '', regex=False)
-                rushing['Rush Yards'] = rushing['Rush Yards'].str.replace(',', '', regex=False)
-                rushing.drop(columns=['Team'], inplace=True)
-                rushing = rushing.replace(r'\.', '', regex=True)
-                rushing['Player'] = rushing['Player'].str.replace(r'(Amon-Ra St Brown).*', r'\1', regex=True)
-                rushing.to_excel('hello1.xlsx')
-                return rushing
-        raise ValueError('Status code is not right')
+        return self._load_footballdb(
+            self.urlRushing,
+            drop=['Lg', 'FD', 'Team'],
+            rename={'Yds': 'Rush Yards', 'Pos': 'Position', 'Gms': 'Games'},
+            numeric_columns=['Games', 'Att', 'Rush Yards', 'Avg', 'YPG', 'TD']
+        )
 
     def load_fumble_data(self):
-        fumbles = pd.read_html(self.urlFumbles)[0]
-        fumbles.drop(columns=['Team', 'Rank'], inplace=True)
-        fumbles.rename(columns={'Value' : 'Fmb', 'Pos' : 'Position'}, inplace=True)
-        fumbles['Player'] = fumbles['Player'].str.replace(' Jr.', '', regex=False)
-        return fumbles
+        fumbles = (
+            pd.read_html(StringIO(self._fetch_html(self.urlFumbles)), flavor='lxml')[0]
+            .drop(columns=['Team', 'Rank'])
+            .rename(columns={'Value' : 'Fmb', 'Pos' : 'Position'})
+            .assign(Player=lambda d: d['Player'].astype(_PLAYER_DTYPE).str.replace(' Jr.', '', regex=False))
+        )
+        return self.cast_numeric_columns(fumbles, ['Fmb'])
 
     def merge_datasets(self):
-        partial_merge = pd.merge(self.passing, self.receiving, on=['Player'], how='outer')
-        final_merged_data = pd.merge(partial_merge, self.rushing, on=['Player'], how='outer')
-        final_merged_data2 = pd.merge(final_merged_data, self.conversions, on=['Player'], how='outer')
-        final_merged_data2.drop(columns=['Rk'], inplace=True)
-        final_merged_data1 = pd.merge(final_merged_data2, self.fumbles, on=['Player'], how='outer')
+        # Drop the rank column before joining so it is never carried through the merges
+        datasets = [
+            dataset.drop(columns=['Rk'], errors='ignore')
+            for dataset in [self.passing, self.receiving, self.rushing, self.conversions, self.fumbles]
+        ]
+        # Encode player names as integer codes in a single pass so the joins hash
+        # ints instead of strings; sort=True keeps the alphabetical order of the
+        # outer joins on names
+        codes, player_names = pd.factorize(pd.concat([dataset['Player'] for dataset in datasets]), sort=True)
+        offsets = np.cumsum([len(dataset) for dataset in datasets])[:-1]
+        datasets = [
+            dataset.assign(Player=dataset_codes)
+            for dataset, dataset_codes in zip(datasets, np.split(codes, offsets))
+        ]
+        # Players who changed teams have one row per team, so the joins are many-to-many
+        final_merged_data1 = reduce(
+            lambda left, right: pd.merge(left, right, on='Player', how='outer', validate='many_to_many'),
+            datasets
+        )
+        final_merged_data1['Player'] = player_names.take(
+            final_merged_data1['Player'].to_numpy(), allow_fill=True, fill_value=np.nan
+        )
         final_merged_data1 = final_merged_data1[~final_merged_data1['Player'].str.contains('Player', na=False)]
-        final_merged_data1.to_excel('final.xlsx')
+        final_merged_data1 = self.convert_numeric_columns(final_merged_data1)
         return final_merged_data1
 
+    def write_debug_files(self):
+        """
+        Write the scraped and merged DataFrames to CSV files for inspection.
+        """
+        self.passing.to_csv('passing.csv', index=False)
+        self.receiving.to_csv('receiving.csv', index=False)
+        self.rushing.to_csv('rushing.csv', index=False)
+        self.final_data.to_csv('final.csv', index=False)
+
+    def cast_numeric_columns(self, data, columns):
+        """
+        Cast a loader's stat columns to numbers in one bulk pass, so they are
+        not carried through the merge as strings.
+
+        Parameters:
+        - data: A DataFrame returned by one of the loaders.
+        - columns: The stat columns known to be numeric in that source.
+
+        Returns:
+        - A copy of the DataFrame with the columns as integers where possible,
+          floats otherwise, and NaN for unparseable cells (e.g. repeated header rows).
+        """
+        data = data.copy()
+        # Remove thousands separators such as "1,234" from any column still held as text
+        text_columns = [col for col in columns if data[col].dtype == 'object']
+        data[text_columns] = data[text_columns].apply(lambda values: values.astype(str).str.replace(',', '', regex=False))
+        data[columns] = data[columns].apply(pd.to_numeric, errors='coerce', downcast='integer')
+        return data
+
+    def convert_numeric_columns(self, data):
+        """
+        Store the merged stat columns as float32. The loaders already parse them
+        into numbers with cast_numeric_columns, so this is a plain dtype cast that
+        gives every stat column one compact type after the outer joins.
+
+        Parameters:
+        - data: The merged DataFrame.
+
+        Returns:
+        - A copy of the DataFrame with float32 stat columns.
+        """
+        stat_columns = data.select_dtypes('number').columns
+        return data.astype(dict.fromkeys(stat_columns, 'float32'))
+
+    def build_games_lookup(self):
+        """
+        Map each player to their games played, using the first available of the
+        Games columns left behind by the merges.
+
+        Returns:
+        - A dictionary of player name to games played.
+        """
+        games_columns = [col for col in ['Games', 'Games_y', 'Games_x'] if col in self.final_data.columns]
+        if not games_columns:
+            return {}
+        games = self.final_data[games_columns].bfill(axis=1).iloc[:, 0]
+        return games.groupby(self.final_data['Player']).first().dropna().to_dict()
+
+    @property
+    def by_player(self):
+        """
+        The final data indexed by player name, built once on first access
+        so per-player lookups don't rescan the whole DataFrame.
+        """
+        if self._by_player is None:
+            self._by_player = self.final_data.set_index('Player', drop=False)
+        return self._by_player
+
+    @property
+    def final_data_pl(self):
+        """
+        A polars LazyFrame of the final data for batched scoring of large datasets,
+        or None when polars is not installed or the data is small enough for pandas.
+        """
+        if len(self.final_data) < self.POLARS_MIN_ROWS:
+            return None
+        if self._final_data_pl is None:
+            # Imported here rather than at module load, since only large datasets need it
+            try:
+                import polars as pl
+            except ImportError:  # polars is optional; scoring falls back to pandas
+                return None
+            self._final_data_pl = pl.from_pandas(self.final_data).lazy()
+        return self._final_data_pl
 
 
 